@@ -0,0 +1,185 @@
+import csv
+import datetime as dt
+from pathlib import Path
+
+from loguru import logger
+
+from src.invoice import utils
+from src.invoice.models.customer import Customer
+from src.invoice.models.history import InvoiceRecord, ReminderRecord
+from src.invoice.template import get_input_files
+from src.jobs import DirectoryQueue, new_batch
+from src.letter.models.letter import Letter, Location
+from src.letter.template import LETTER_OUT_DIR, LETTER_TMP_DIR, render_letter
+from src.models import Config
+from src.settings import DUNNING_HISTORY_FILE
+from src.utils import compose_latex_command, config_logging, escape_latex, execute_command, load_config
+
+# Subject and text of each dunning level (the last level is repeated, if the invoice is still not paid)
+DUNNING_LEVELS = {
+    1: (
+        "Zahlungserinnerung",
+        (
+            "sicherlich ist es Ihrer Aufmerksamkeit entgangen, dass die Rechnung {invoice_number} vom {date} über "
+            "{total} bis zum {due_date} fällig war. Bitte überweisen Sie den offenen Betrag bis zum {new_due_date}."
+        ),
+    ),
+    2: (
+        "1. Mahnung",
+        (
+            "leider konnten wir trotz unserer Zahlungserinnerung keinen Zahlungseingang für die Rechnung "
+            "{invoice_number} vom {date} über {total} feststellen. Wir bitten Sie, den offenen Betrag bis "
+            "spätestens zum {new_due_date} zu überweisen."
+        ),
+    ),
+    3: (
+        "Letzte Mahnung",
+        (
+            "die Rechnung {invoice_number} vom {date} über {total} ist trotz Zahlungserinnerung und Mahnung "
+            "weiterhin offen. Sollte der Betrag nicht bis zum {new_due_date} bei uns eingehen, sehen wir uns "
+            "gezwungen, weitere Schritte einzuleiten."
+        ),
+    ),
+}
+
+
+def find_overdue(
+    invoices: dict[int, InvoiceRecord], reminders: dict[int, ReminderRecord], config: Config, date: dt.date
+) -> list[tuple[InvoiceRecord, int]]:
+    """Return all unpaid invoices past due (and without a recent reminder) with their next dunning level."""
+    overdue = []
+
+    for invoice in invoices.values():
+        if invoice.status == "paid":
+            continue
+
+        # Invoices archived before the due date was stored use the configured payment term
+        due_date = invoice.due_date or invoice.date + dt.timedelta(days=config.invoice.due_days)
+        reminder = reminders.get(invoice.invoice_id)
+
+        if reminder is not None:
+            due_date = max(due_date, reminder.date + dt.timedelta(days=config.invoice.reminder_days))
+
+        if due_date < date:
+            level = min(reminder.level + 1 if reminder else 1, max(DUNNING_LEVELS))
+            overdue.append((invoice, level))
+
+    return overdue
+
+
+def compose_reminder(invoice: InvoiceRecord, level: int, customer: Customer, config: Config, date: dt.date):
+    """Compose the letter and its content (as LaTeX) for a reminder."""
+    subject, text = DUNNING_LEVELS[level]
+    invoice_number = f"RE{invoice.invoice_id:04d}"
+    due_date = invoice.due_date or invoice.date + dt.timedelta(days=config.invoice.due_days)
+
+    paragraph = text.format(
+        invoice_number=invoice_number,
+        date=invoice.date.strftime("%d.%m.%Y"),
+        total=f"{invoice.total:.2f} EUR".replace(".", ","),
+        due_date=due_date.strftime("%d.%m.%Y"),
+        new_due_date=(date + dt.timedelta(days=config.invoice.reminder_days)).strftime("%d.%m.%Y"),
+    )
+    bank = (
+        f"Bankverbindung: {config.company.name}, IBAN {config.company.bank.iban}, {config.company.bank.bank_name}, "
+        f"Verwendungszweck: Rechnung {invoice_number}"
+    )
+    notice = (
+        "Sollten Sie die Zahlung bereits veranlasst haben, betrachten Sie dieses Schreiben bitte als gegenstandslos."
+    )
+
+    letter = Letter(
+        toname=customer.company or customer.name,
+        toaddress=customer.address,
+        location=[
+            Location(key="Rechnungsnummer", value=invoice_number),
+            Location(key="Kundennummer", value=customer.customer_id),
+        ],
+        subject=f"{subject} zur Rechnung {invoice_number}",
+    )
+    content = "\n\n".join(escape_latex(part) for part in [paragraph, bank, notice])
+
+    return letter, content
+
+
+def store_reminders(reminders: list[ReminderRecord], file: Path = DUNNING_HISTORY_FILE):
+    """Append the sent reminders to the dunning archive."""
+    is_new = not file.exists()
+
+    with file.open("a") as f:
+        writer = csv.writer(f)
+        if is_new:
+            writer.writerow(["invoice_id", "level", "date"])
+        for reminder in reminders:
+            writer.writerow([reminder.invoice_id, reminder.level, reminder.date.strftime("%Y-%m-%d")])
+
+
+def create_dunning(
+    date: str | None = None,
+    dry_run: bool = False,
+    verbose: bool = False,
+    queue: bool = False,
+):
+    """Create reminder letters for all unpaid invoices past due.
+
+    Every reminder escalates the dunning level of an invoice (see `DUNNING_LEVELS`). A new reminder is only sent
+    once the deadline of the previous one (`reminder_days` in the config file) has passed.
+    """
+    config_logging(verbose)
+
+    reference_date = dt.date.today() if date is None else dt.date.fromisoformat(str(date))
+    customer_database, config_path = get_input_files(example_mode=False)
+    config = load_config(config_path)
+
+    overdue = find_overdue(utils.load_invoice_index(), utils.load_reminders(), config, reference_date)
+    logger.info(f"Found {len(overdue)} overdue invoice(s) as of {reference_date}.")
+
+    if not overdue:
+        return
+
+    # Render all reminders before compiling any of them
+    LETTER_OUT_DIR.mkdir(parents=True, exist_ok=True)
+    LETTER_TMP_DIR.mkdir(parents=True, exist_ok=True)
+    tex_files = []
+
+    for invoice, level in overdue:
+        customer = utils.load_customer(customer_database, invoice.customer_id)
+        letter, content = compose_reminder(invoice, level, customer, config, reference_date)
+
+        tex_file = LETTER_TMP_DIR / f"dunning_RE{invoice.invoice_id:04d}_{level}.tex"
+        with tex_file.open("w") as f:
+            f.write(render_letter(config, letter, content, tex_file.stem))
+        tex_files.append(tex_file)
+
+    if dry_run:
+        logger.info("Dry run mode enabled. Skipping PDF generation.")
+        logger.debug(f"Rendered templates saved to: {LETTER_TMP_DIR}")
+        return
+
+    if queue:
+        job_queue = DirectoryQueue()
+        batch = new_batch()
+        for order, tex_file in enumerate(tex_files):
+            job_queue.submit(batch, order, tex_file.stem, tex_file)
+        results = job_queue.collect(batch, len(tex_files), LETTER_OUT_DIR)
+        pdf_files = [results.get(order) for order in range(len(tex_files))]
+    else:
+        pdf_files = []
+        for tex_file in tex_files:
+            pdf_file = LETTER_OUT_DIR / (tex_file.stem + ".pdf")
+            latex_command = compose_latex_command(LETTER_OUT_DIR, tex_file, verbose)
+            logger.debug(f"Latex command: {latex_command}")
+            pdf_files.append(pdf_file if execute_command(latex_command, output_file=pdf_file) else None)
+
+    reminders = [
+        ReminderRecord(invoice_id=invoice.invoice_id, level=level, date=reference_date)
+        for (invoice, level), pdf_file in zip(overdue, pdf_files, strict=True)
+        if pdf_file is not None
+    ]
+    logger.info(f"Created {len(reminders)} reminder(s) in {LETTER_OUT_DIR}")
+
+    if reminders and utils.confirm(f"Did everything look good and do you want to record {len(reminders)} reminder(s)?"):
+        store_reminders(reminders)
+        logger.success("Reminders recorded.")
+    else:
+        logger.info("Skipping recording of the reminders.")
@@ -0,0 +1,137 @@
+import datetime as dt
+import json
+import os
+from pathlib import Path
+from typing import Any
+
+from loguru import logger
+
+from src.settings import JOURNAL_DIR
+
+# Steps of an invoice in the order they are completed (`declined` replaces `archived` and `committed`)
+JOURNAL_STEPS = ["reserved", "rendered", "compiled", "archived", "committed"]
+# Discards all previous steps of an invoice (e.g. its reserved number), so it starts over when resuming
+JOURNAL_RELEASED_STEP = "released"
+JOURNAL_FINAL_STEPS = {"committed", "declined"}
+
+
+class BatchJournal:
+    """Write-ahead journal of an invoice batch.
+
+    Every completed step of an invoice (see `JOURNAL_STEPS`) is appended to a json lines file and flushed to disk,
+    before the next step starts. An interrupted batch can therefore be resumed exactly where it stopped, reusing
+    the reserved invoice numbers. Journals are identified by the path of their invoice file, so the file can be
+    fixed before resuming. Without a file (e.g. in dry run mode), the journal is only kept in memory.
+    """
+
+    def __init__(self, file: Path | None = None):
+        self.file = file
+        self.entries: list[dict[str, Any]] = []
+
+        if file is not None and file.exists():
+            with file.open("r") as f:
+                for line in f:
+                    try:
+                        self.entries.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        # The last entry may be incomplete, if the process was killed while writing it
+                        logger.warning(f"Ignoring incomplete journal entry in {file}")
+
+    @classmethod
+    def interrupted(cls) -> list["BatchJournal"]:
+        """Return the journals of all interrupted (not finished) batches."""
+        return [
+            journal
+            for journal in (cls(file) for file in sorted(JOURNAL_DIR.glob("*.jsonl")))
+            if journal.entries and not journal.finished
+        ]
+
+    @classmethod
+    def check_interrupted(cls, source_file: Path | None = None):
+        """Raise a `ValueError` if an interrupted batch holds reserved invoice numbers (or belongs to the file).
+
+        Otherwise, a new batch could assign the numbers reserved for the interrupted one a second time.
+        """
+        for journal in cls.interrupted():
+            if journal.reserved_invoice_ids() or (source_file is not None and journal.source == source_file.resolve()):
+                raise ValueError(
+                    f"The batch {journal.file} for {journal.source} was interrupted. Continue it using "
+                    f"`just invoice {journal.source} --resume` (or delete the journal to discard it)."
+                )
+
+    @classmethod
+    def open(cls, source_file: Path, resume: bool) -> "BatchJournal":
+        """Start a new journal for the source file, or continue the interrupted journal of it (`resume`)."""
+        if resume:
+            interrupted = [journal for journal in cls.interrupted() if journal.source == source_file.resolve()]
+            if not interrupted:
+                raise FileNotFoundError(f"No interrupted batch found for {source_file}")
+            logger.info(f"Resuming interrupted batch {interrupted[-1].file}")
+            return interrupted[-1]
+
+        cls.check_interrupted(source_file)
+
+        JOURNAL_DIR.mkdir(parents=True, exist_ok=True)
+        journal = cls(JOURNAL_DIR / f"{dt.datetime.now().strftime('%Y%m%d%H%M%S')}_{source_file.stem}.jsonl")
+        journal.record(None, "started", source=str(source_file.resolve()))
+        return journal
+
+    @property
+    def source(self) -> Path | None:
+        """Return the (absolute) path of the invoice file of the batch."""
+        if not self.entries or "source" not in self.entries[0]:
+            return None
+        return Path(self.entries[0]["source"]).resolve()
+
+    @property
+    def finished(self) -> bool:
+        return any(entry["step"] == "finished" for entry in self.entries)
+
+    def record(self, index: int | None, step: str, **data: Any):
+        """Append a completed step of the invoice at `index` (of the source file) to the journal."""
+        entry = {"index": index, "step": step, **data}
+        self.entries.append(entry)
+
+        if self.file is not None:
+            with self.file.open("a") as f:
+                f.write(json.dumps(entry, default=str) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+    def state(self, index: int) -> dict[str, Any]:
+        """Return the completed steps (`steps`) and the recorded data of an invoice."""
+        state: dict[str, Any] = {"steps": set()}
+        for entry in self.entries:
+            if entry["index"] == index and entry["step"] == JOURNAL_RELEASED_STEP:
+                state = {"steps": set()}
+            elif entry["index"] == index:
+                # Rendering the invoice again (e.g. after fixing the invoice file) invalidates its compilation
+                if entry["step"] == "rendered":
+                    state["steps"].discard("compiled")
+                state["steps"].add(entry["step"])
+                state.update({k: v for k, v in entry.items() if k not in ["index", "step"]})
+        return state
+
+    def reserved_invoice_ids(self) -> list[int]:
+        """Return the invoice ids reserved by invoices of the batch, which are not committed or declined yet."""
+        return [
+            state["invoice_id"]
+            for state in (self.state(index) for index in {entry["index"] for entry in self.entries})
+            if "reserved" in state["steps"] and not state["steps"] & JOURNAL_FINAL_STEPS
+        ]
+
+    def next_invoice_id(self, invoice_id: int) -> int:
+        """Return the next free invoice id, skipping the ids reserved by this and all other interrupted batches."""
+        reserved_ids = self.reserved_invoice_ids()
+        for journal in self.interrupted():
+            if journal.file != self.file:
+                reserved_ids += journal.reserved_invoice_ids()
+        return max([invoice_id, *(reserved_id + 1 for reserved_id in reserved_ids)])
+
+    def finish_if_complete(self, indices: list[int]):
+        """Mark the batch as finished, once all given invoices are committed or declined."""
+        if all(self.state(index)["steps"] & JOURNAL_FINAL_STEPS for index in indices):
+            self.record(None, "finished")
+            logger.debug("Batch finished.")
+        else:
+            logger.warning("The batch is incomplete. Continue it using `--resume`.")
@@ -1,4 +1,5 @@
+from .contracts import Contracts
 from .customer import Customer
 from .invoices import Invoices
 
-__all__ = ["Customer", "Invoices"]
+__all__ = ["Contracts", "Customer", "Invoices"]
@@ -0,0 +1,44 @@
+import datetime as dt
+from typing import Literal
+
+from pydantic import BaseModel, Field, field_validator
+
+from src.invoice.models.invoices import Item
+
+
+class Contract(BaseModel):
+    """Contract model for a recurring invoice.
+
+    A contract is billed once per interval, starting at `start_date` until `end_date` (if set).
+    """
+
+    contract_id: int = Field(ge=1)
+    customer_id: int = Field(ge=10000)
+    interval: Literal["monthly", "quarterly", "yearly"] = "monthly"
+    start_date: dt.date
+    end_date: dt.date | None = None
+    items: list[Item]
+
+    def __init__(self, **data):
+        """Initialize the contract model."""
+        super().__init__(**data)
+
+        if not self.items:
+            raise ValueError("List of items must not be empty.")
+
+        if self.end_date is not None and self.end_date < self.start_date:
+            raise ValueError("End date must not be before the start date.")
+
+
+class Contracts(BaseModel):
+    """Contracts model for a contract file."""
+
+    contracts: list[Contract]
+
+    @field_validator("contracts")
+    @classmethod
+    def check_unique_ids(cls, v: list[Contract]):
+        contract_ids = [c.contract_id for c in v]
+        if len(contract_ids) != len(set(contract_ids)):
+            raise ValueError("Contract ids must be unique.")
+        return v
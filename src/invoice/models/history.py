@@ -0,0 +1,26 @@
+import datetime as dt
+from typing import Literal
+
+from pydantic import BaseModel, Field
+
+
+class InvoiceRecord(BaseModel):
+    """Invoice model for a row of the invoice archive (`invoice.csv`)."""
+
+    invoice_id: int = Field(ge=1)
+    customer_id: int = Field(ge=10000)
+    date: dt.date
+    total: float = Field(ge=0)
+    status: Literal["sent", "paid"]
+    start_date: dt.date | None = None
+    end_date: dt.date | None = None
+    contract_id: int | None = None
+    due_date: dt.date | None = None
+
+
+class ReminderRecord(BaseModel):
+    """Reminder model for a row of the dunning archive (`dunning.csv`)."""
+
+    invoice_id: int = Field(ge=1)
+    level: int = Field(ge=1)
+    date: dt.date
@@ -24,6 +24,7 @@ class Invoice(BaseModel):
     """Invoice model for a invoice file."""
 
     customer_id: int = Field(ge=10000)
+    contract_id: int | None = Field(None, ge=1)
     invoice_id: int | None = Field(None, ge=1)
     invoice_number: str | None = Field(None, pattern=r"^RE\d{4}$")
     date: dt.date = Field(dt.date.today())
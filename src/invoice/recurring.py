@@ -0,0 +1,125 @@
+import calendar
+import datetime as dt
+from collections.abc import Iterator
+from pathlib import Path
+
+from loguru import logger
+
+from src.invoice import utils
+from src.invoice.journal import BatchJournal
+from src.invoice.models.contracts import Contract, Contracts
+from src.invoice.models.invoices import Invoice
+from src.invoice.template import check_invoices, create_invoice, get_input_files
+from src.settings import CONTRACT_EXAMPLE_FILE
+from src.utils import config_logging, load_config
+
+INTERVAL_MONTHS = {"monthly": 1, "quarterly": 3, "yearly": 12}
+
+
+def add_months(date: dt.date, months: int) -> dt.date:
+    """Add a number of months to a date (the day is clamped to the end of the month)."""
+    month_index = date.month - 1 + months
+    year, month = date.year + month_index // 12, month_index % 12 + 1
+    return date.replace(year=year, month=month, day=min(date.day, calendar.monthrange(year, month)[1]))
+
+
+def parse_period(period: str | None) -> tuple[dt.date, dt.date]:
+    """Parse a billing period (`YYYY-MM`, defaults to the current month) into its first and last day."""
+    first_day = dt.date.today().replace(day=1) if period is None else dt.datetime.strptime(period, "%Y-%m").date()
+    return first_day, add_months(first_day, 1) - dt.timedelta(days=1)
+
+
+def service_periods(
+    contract: Contract, period_start: dt.date, period_end: dt.date
+) -> Iterator[tuple[dt.date, dt.date]]:
+    """Yield the service periods of a contract that start within the given billing period.
+
+    Every service period is derived from the contract start, so clamped days (e.g. the 31st) do not drift.
+    """
+    months = INTERVAL_MONTHS[contract.interval]
+    index = 0
+
+    while (start_date := add_months(contract.start_date, index * months)) <= period_end:
+        if contract.end_date is not None and start_date > contract.end_date:
+            return
+
+        if start_date >= period_start:
+            end_date = add_months(contract.start_date, (index + 1) * months) - dt.timedelta(days=1)
+            yield start_date, min(end_date, contract.end_date) if contract.end_date else end_date
+
+        index += 1
+
+
+def expand_contracts(
+    contracts: Contracts, period_start: dt.date, period_end: dt.date, history: list[dict[str, str]]
+) -> list[Invoice]:
+    """Expand the contracts into the invoices due within the billing period.
+
+    Service periods that are already part of the invoice archive are skipped, so a rerun never bills twice.
+    """
+    billed = {(row.get("contract_id"), row.get("start_date")) for row in history}
+    invoices = []
+
+    for contract in contracts.contracts:
+        for start_date, end_date in service_periods(contract, period_start, period_end):
+            if (str(contract.contract_id), start_date.strftime("%Y-%m-%d")) in billed:
+                logger.info(
+                    f"Skipping contract {contract.contract_id} from {start_date} because it was already billed."
+                )
+                continue
+
+            invoices.append(
+                Invoice(
+                    customer_id=contract.customer_id,
+                    contract_id=contract.contract_id,
+                    start_date=start_date,
+                    end_date=end_date,
+                    items=[item.model_copy() for item in contract.items],
+                )
+            )
+
+    return invoices
+
+
+def generate_recurring(
+    contracts_path: Path | str | None = None,
+    period: str | None = None,
+    dry_run: bool = False,
+    verbose: bool = False,
+):
+    """Create the recurring invoices of all contracts due within a billing period.
+
+    The period is given as `YYYY-MM` and defaults to the current month.
+    Invoices are created through the regular invoice pipeline, without writing an intermediate invoice file.
+    """
+    config_logging(verbose)
+
+    example_mode = contracts_path is None
+    contracts_path = CONTRACT_EXAMPLE_FILE if contracts_path is None else Path(contracts_path)
+    customer_database, config_path = get_input_files(example_mode)
+
+    # Log the used files
+    logger.debug(f"Using contracts file: {contracts_path}")
+    logger.debug(f"Using customer database: {customer_database}")
+    logger.debug(f"Using config file: {config_path}")
+
+    # Check if all files exist
+    for file in [contracts_path, customer_database, config_path]:
+        if not file.exists():
+            raise FileNotFoundError(f"File not found: {file}")
+
+    config = load_config(config_path)
+    period_start, period_end = parse_period(None if period is None else str(period))
+
+    invoices = expand_contracts(
+        utils.load_contracts(contracts_path), period_start, period_end, utils.load_invoice_history()
+    )
+    logger.info(f"Found {len(invoices)} recurring invoice(s) due between {period_start} and {period_end}.")
+    check_invoices(invoices, config, customer_database)
+
+    # Reruns are idempotent against the invoice archive, therefore the journal is only kept in memory
+    if not (dry_run or example_mode):
+        BatchJournal.check_interrupted()
+    journal = BatchJournal()
+    for index, invoice in enumerate(invoices):
+        create_invoice(invoice, config, customer_database, dry_run, verbose, example_mode, index, journal)
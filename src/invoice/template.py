@@ -1,5 +1,6 @@
 import csv
 import datetime
+import hashlib
 import os
 import subprocess
 from pathlib import Path
@@ -7,8 +8,10 @@ from pathlib import Path
 from loguru import logger
 
 from src.invoice import utils
+from src.invoice.journal import JOURNAL_FINAL_STEPS, JOURNAL_RELEASED_STEP, BatchJournal
 from src.invoice.models.customer import Customer
 from src.invoice.models.invoices import Invoice
+from src.jobs import DirectoryQueue, new_batch
 from src.models import Config
 from src.settings import (
     CONFIG_DEFAULT_FILE,
@@ -22,17 +25,51 @@ from src.settings import (
     OUT_DIR,
     TMP_DIR,
 )
-from src.utils import compose_latex_command, config_logging, execute_command, latex_jinja_env, load_config
+from src.utils import (
+    check_latex,
+    compose_latex_command,
+    config_logging,
+    execute_command,
+    latex_jinja_env,
+    load_config,
+)
 
 INVOICE_OUT_DIR = OUT_DIR / "invoice"
 INVOICE_TMP_DIR = TMP_DIR / "invoice"
+INVOICE_HISTORY_FIELDS = [
+    "invoice_id",
+    "customer_id",
+    "date",
+    "total",
+    "status",
+    "start_date",
+    "end_date",
+    "contract_id",
+    "due_date",
+]
 
 
 def setup_csv_archive(file: Path = INVOICE_HISTORY_FILE):
-    """Create the csv archive file if it doesn't exist."""
+    """Create the csv archive file if it doesn't exist.
+
+    Archives created by older versions are migrated by appending the missing columns. Additional columns (e.g.
+    added by the user) are kept.
+    """
     if not file.exists():
         with file.open("w") as f:
-            csv.writer(f).writerow(["invoice_id", "customer_id", "date", "total", "status"])
+            csv.writer(f).writerow(INVOICE_HISTORY_FIELDS)
+        return
+
+    with file.open("r") as f:
+        reader = csv.DictReader(f)
+        fieldnames = list(reader.fieldnames or [])
+        missing_fields = [field for field in INVOICE_HISTORY_FIELDS if field not in fieldnames]
+        if not missing_fields:
+            return
+        rows = list(reader)
+
+    logger.info(f"Migrating invoice archive, adding the columns: {', '.join(missing_fields)}")
+    write_csv_archive(rows, file, [*fieldnames, *missing_fields])
 
 
 def get_invoice_id(
@@ -60,36 +97,114 @@ def get_invoice_id(
     return int(custom_last_invoice) if max_invoice_id == 0 else max_invoice_id + 1
 
 
+def read_csv_archive(file: Path = INVOICE_HISTORY_FILE) -> tuple[list[str], list[dict[str, str]]]:
+    """Read the columns and rows of the csv archive (creating or migrating it first)."""
+    setup_csv_archive(file)
+
+    with file.open("r") as f:
+        reader = csv.DictReader(f)
+        rows = list(reader)
+        return list(reader.fieldnames or INVOICE_HISTORY_FIELDS), rows
+
+
+def write_csv_archive(
+    rows: list[dict[str, str]], file: Path = INVOICE_HISTORY_FILE, fieldnames: list[str] = INVOICE_HISTORY_FIELDS
+):
+    """Replace the csv archive atomically, so an interruption never leaves a partially written file.
+
+    The `fieldnames` have to include all columns of the existing file, so no column of the user is lost.
+    """
+    staging_file = file.with_suffix(".csv.tmp")
+    with staging_file.open("w") as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(rows)
+        f.flush()
+        os.fsync(f.fileno())
+    staging_file.replace(file)
+
+
 def store_invoice_parameter(invoice: Invoice):
     """Store the invoice data to a csv file.
 
     This function should only be called after the invoice has been generated, and the user has confirmed that everything looks good.
+    Invoices which are already part of the archive are not stored again, but have to match the stored row.
     """
-    # Create the file if it doesn't exist and add the header (invoice_id,customer_id,date,total,status)
-    setup_csv_archive()
+    # Create the file if it doesn't exist and add the header (see `INVOICE_HISTORY_FIELDS`)
+    fieldnames, rows = read_csv_archive()
+
+    new_row = {
+        "invoice_id": str(invoice.invoice_id),
+        "customer_id": str(invoice.customer_id),
+        "date": invoice.date.strftime("%Y-%m-%d"),
+        "total": str(invoice.total),
+        "status": "sent",
+        "start_date": invoice.start_date.strftime("%Y-%m-%d") if invoice.start_date else "",
+        "end_date": invoice.end_date.strftime("%Y-%m-%d") if invoice.end_date else "",
+        "contract_id": str(invoice.contract_id or ""),
+        "due_date": invoice.due_date.strftime("%Y-%m-%d") if invoice.due_date else "",
+    }
+
+    for row in rows:
+        if row["invoice_id"] != new_row["invoice_id"]:
+            continue
+
+        # The status may have changed since (e.g. paid)
+        differences = [field for field in INVOICE_HISTORY_FIELDS if field != "status" and row[field] != new_row[field]]
+        if differences:
+            raise ValueError(
+                f"Invoice {invoice.invoice_number} is already stored in the archive with different values "
+                f"({', '.join(differences)}). The invoice number was probably used twice."
+            )
+
+        logger.info(f"Invoice {invoice.invoice_number} is already stored in the archive.")
+        return
 
     # Write the invoice data to the file
-    with (INVOICE_HISTORY_FILE).open("a") as f:
-        csv.writer(f).writerow(
-            [
-                invoice.invoice_id,
-                invoice.customer_id,
-                invoice.date.strftime("%Y-%m-%d"),
-                invoice.total,
-                "sent",
-            ]
-        )
+    rows.append(new_row)
+    write_csv_archive(rows, fieldnames=fieldnames)
+
+
+def mark_paid(*invoice_ids: int, file: Path = INVOICE_HISTORY_FILE):
+    """Mark invoices of the csv archive as paid (usage: paid <invoice_id> [<invoice_id> ...])."""
+    fieldnames, rows = read_csv_archive(file)
+
+    known_ids = {row["invoice_id"] for row in rows}
+    for invoice_id in invoice_ids:
+        if str(invoice_id) not in known_ids:
+            raise ValueError(f"No invoice found with id {invoice_id}")
+
+    for row in rows:
+        if int(row["invoice_id"]) in invoice_ids:
+            row["status"] = "paid"
+
+    write_csv_archive(rows, file, fieldnames)
+    logger.success(f"Marked {len(invoice_ids)} invoice(s) as paid.")
+
+
+def get_archive_file(output_file: str, year: int) -> Path:
+    """Return the path of the archived pdf file."""
+    return INVOICE_DIR / "archive" / str(year) / (output_file + ".pdf")
 
 
 def archive_pdf(output_file: str, year: int):
     """Archive the pdf file."""
     # Check if the archive directory exists
     (INVOICE_DIR / "archive" / str(year)).mkdir(parents=True, exist_ok=True)
+    archive_file = get_archive_file(output_file, year)
+
+    # The invoice may already be archived by an interrupted run, but an archived invoice is never replaced
+    if archive_file.exists():
+        if (INVOICE_OUT_DIR / (output_file + ".pdf")).exists():
+            raise FileExistsError(f"Invoice {output_file} is already archived: {archive_file}")
+
+        logger.info(f"Invoice {output_file} is already archived.")
+        return
 
     # Archive the invoice from the output directory to the archive directory
     Path.rename(
         INVOICE_OUT_DIR / (output_file + ".pdf"),
-        INVOICE_DIR / "archive" / str(year) / (output_file + ".pdf"),
+        archive_file,
     )
 
 
@@ -148,27 +263,23 @@ def compose_email(
     return email_command
 
 
-# outsource the code for creating one invoice to a function
-def create_invoice(
-    invoice: Invoice, config: Config, customer_file: Path, dry_run: bool, verbose: bool, example_mode: bool
-):
-    """Create one invoice."""
-    # Skip invoices that have already been sent or paid
-    if invoice.status in ["sent", "paid"]:
-        logger.info("Skipping invoice because it has already been sent or paid.")
-        return
-
-    # Load customer
-    customer = utils.load_customer(customer_file, invoice.customer_id)
-
+def assign_invoice_number(invoice: Invoice, config: Config, invoice_id: int):
+    """Assign the invoice number and calculate the due date."""
     # Create invoice number
-    invoice.invoice_id = get_invoice_id(dry_run)
+    invoice.invoice_id = invoice_id
     invoice.invoice_number = f"RE{invoice.invoice_id:04d}"
 
     # Calculate due date
     if invoice.due_date is None:
         invoice.due_date = invoice.date + datetime.timedelta(days=config.invoice.due_days)
 
+
+def render_invoice(invoice: Invoice, config: Config, customer: Customer) -> str:
+    """Render the invoice template and check the resulting tex file."""
+    # Validate that the invoice number is assigned
+    if invoice.invoice_number is None or invoice.due_date is None:
+        raise ValueError("Invoice number and due date must be set.")
+
     # Load and configure jinja2 template
     template = latex_jinja_env.get_template("invoice.tex.j2")
 
@@ -187,92 +298,321 @@ def create_invoice(
         additional={"purpose": f"Rechnung {invoice.invoice_number} vom {invoice.date.strftime('%d.%m.%Y')}"},
     )
 
+    check_latex(rendered_template, invoice.invoice_number)
+    return rendered_template
+
+
+def reserve_invoice(invoice: Invoice, index: int, config: Config, journal: BatchJournal, dry_run: bool):
+    """Assign the invoice number, reusing the number (and date) reserved by an interrupted run."""
+    state = journal.state(index)
+
+    if "reserved" in state["steps"]:
+        # The invoice file may be fixed before resuming, but the invoices must stay in the same order
+        if str(state.get("customer_id", invoice.customer_id)) != str(invoice.customer_id):
+            raise ValueError(
+                f"Invoice {index + 1} was reserved for customer {state['customer_id']}, but is now for customer "
+                f"{invoice.customer_id}. Invoices must not be added, removed or reordered before resuming."
+            )
+
+        invoice.date = datetime.date.fromisoformat(state["date"])
+        invoice.due_date = datetime.date.fromisoformat(state["due_date"])
+        assign_invoice_number(invoice, config, state["invoice_id"])
+        return
+
+    assign_invoice_number(invoice, config, journal.next_invoice_id(get_invoice_id(dry_run)))
+    journal.record(
+        index,
+        "reserved",
+        invoice_id=invoice.invoice_id,
+        customer_id=invoice.customer_id,
+        date=invoice.date,
+        due_date=invoice.due_date,
+    )
+
+
+def write_invoice(invoice: Invoice, index: int, config: Config, customer: Customer, journal: BatchJournal) -> str:
+    """Render the invoice and store the tex file (unless an interrupted run already stored the same file).
+
+    If the invoice file was changed before resuming, the invoice is rendered (and compiled) again.
+    Returns the name of the output file (contains invoice number, date and customer id).
+    """
+    output_file = f"{invoice.invoice_number}_{invoice.date.strftime('%Y%m%d')}_{customer.customer_id}"
+    generated_tex_file = INVOICE_TMP_DIR / (output_file + ".tex")
+    state = journal.state(index)
+
     # Create output and tmp directory if they don't exist
     INVOICE_OUT_DIR.mkdir(parents=True, exist_ok=True)
     INVOICE_TMP_DIR.mkdir(parents=True, exist_ok=True)
 
-    # Compose file name for output (contains invoice number, date and customer id)
-    output_file = f"{invoice.invoice_number}_{invoice.date.strftime('%Y%m%d')}_{customer.customer_id}"
-    generated_tex_file = INVOICE_TMP_DIR / (output_file + ".tex")
+    # Journals of older versions recorded the archiving after moving the pdf, which may have been interrupted
+    if (
+        "compiled" in state["steps"]
+        and "archived" not in state["steps"]
+        and get_archive_file(output_file, invoice.date.year).exists()
+        and not (INVOICE_OUT_DIR / (output_file + ".pdf")).exists()
+    ):
+        journal.record(index, "archived")
+        state = journal.state(index)
+
+    rendered_template = render_invoice(invoice, config, customer)
+    checksum = hashlib.sha256(rendered_template.encode()).hexdigest()
+
+    if "archived" in state["steps"]:
+        # The archived pdf was already confirmed, therefore the invoice must not change anymore
+        if state.get("checksum", checksum) != checksum:
+            raise ValueError(f"Invoice {invoice.invoice_number} was already archived, but its data has changed.")
+        return output_file
+
+    if "rendered" not in state["steps"] or state.get("checksum") != checksum or not generated_tex_file.exists():
+        # Store tex file based on invoice number
+        with generated_tex_file.open("w") as f:
+            f.write(rendered_template)
+        journal.record(index, "rendered", output_file=output_file, checksum=checksum)
+
+    return output_file
+
+
+def needs_compilation(index: int, output_file: str, journal: BatchJournal) -> bool:
+    """Check whether the invoice still has to be compiled (the pdf of an interrupted run may be missing)."""
+    steps = journal.state(index)["steps"]
+    return "compiled" not in steps or (
+        "archived" not in steps and not (INVOICE_OUT_DIR / (output_file + ".pdf")).exists()
+    )
+
+
+def check_invoices(invoices: list[Invoice], config: Config, customer_file: Path):
+    """Render all invoices once (using a placeholder invoice number) without storing them.
+
+    This rejects invalid input within milliseconds, before the first invoice of a batch is compiled.
+    """
+    problems = []
+
+    for index, invoice in enumerate(invoices, 1):
+        if invoice.status in ["sent", "paid"]:
+            continue
+
+        draft = invoice.model_copy(deep=True)
+        try:
+            assign_invoice_number(draft, config, 1)
+            render_invoice(draft, config, utils.load_customer(customer_file, invoice.customer_id))
+        except ValueError as e:
+            problems.append(f"Invoice {index} (customer {invoice.customer_id}): {e}")
+
+    if problems:
+        raise ValueError("\n".join(problems))
+
+
+def commit_invoice(invoice: Invoice, index: int, output_file: str, journal: BatchJournal):
+    """Archive the pdf file and store the invoice in the csv archive.
+
+    Both steps are journaled and idempotent, therefore an interrupted commit is completed when resuming the batch.
+    The archiving is journaled before the pdf is moved, so a resumed batch never compiles or asks for it again.
+    """
+    if "archived" not in journal.state(index)["steps"]:
+        journal.record(index, "archived")
+    archive_pdf(output_file, invoice.date.year)
+
+    store_invoice_parameter(invoice)
+    journal.record(index, "committed")
+    logger.success("Invoice archived and invoice number saved.")
+
+
+def finalize_invoice(
+    invoice: Invoice,
+    index: int,
+    config: Config,
+    customer: Customer,
+    output_file: str,
+    journal: BatchJournal,
+    dry_run: bool,
+    example_mode: bool,
+):
+    """Open the compiled invoice, compose the email and archive the invoice once confirmed."""
+    # The invoice was already confirmed, but the interrupted run could not store it
+    if "archived" in journal.state(index)["steps"]:
+        commit_invoice(invoice, index, output_file, journal)
+        return
+
     generated_pdf_file = INVOICE_OUT_DIR / (output_file + ".pdf")
 
-    # Store tex file based on invoice number
-    with (INVOICE_TMP_DIR / (output_file + ".tex")).open("w") as f:
-        f.write(rendered_template)
+    # If example mode, copy the generated PDF to the example directory
+    if example_mode:
+        Path.rename(
+            generated_pdf_file,
+            EXAMPLE_DIR / "invoice.example.pdf",
+        )
+        generated_pdf_file = EXAMPLE_DIR / "invoice.example.pdf"
+
+    # Open the pdf file
+    if config.settings.open_pdf_viewer:
+        # Needs to be done before thunderbird is opened, because it will block the terminal
+        execute_command(["xdg-open", str(generated_pdf_file)])
+
+    # Generate the email command to open Thunderbird with the invoice attached
+    if config.settings.open_mail_client:
+        thunderbird_command = get_thunderbird()
+
+        if thunderbird_command:
+            execute_command(compose_email(invoice, config, customer, thunderbird_command, generated_pdf_file, dry_run))
+
+    # Ask if everything looked good and if so, archive the invoice and save the invoice number to the csv file
+    if not (dry_run or example_mode) and utils.confirm(
+        "Did everything look good and do you want to archive the invoice?"
+    ):
+        commit_invoice(invoice, index, output_file, journal)
+    else:
+        logger.info("Skipping invoice archiving and invoice number saving.")
+        journal.record(index, "declined")
+
+
+# outsource the code for creating one invoice to a function
+def create_invoice(
+    invoice: Invoice,
+    config: Config,
+    customer_file: Path,
+    dry_run: bool,
+    verbose: bool,
+    example_mode: bool,
+    index: int = 0,
+    journal: BatchJournal | None = None,
+):
+    """Create one invoice.
+
+    The steps are recorded in the journal of the batch (the invoice is identified by its `index` in the batch).
+    Steps already completed by an interrupted run are skipped.
+    """
+    journal = journal or BatchJournal()
+
+    # Skip invoices that have already been sent or paid
+    if invoice.status in ["sent", "paid"]:
+        logger.info("Skipping invoice because it has already been sent or paid.")
+        return
+
+    if journal.state(index)["steps"] & JOURNAL_FINAL_STEPS:
+        logger.info(f"Skipping invoice {index + 1}, because it was completed by the interrupted run.")
+        return
+
+    # Load customer
+    customer = utils.load_customer(customer_file, invoice.customer_id)
+
+    reserve_invoice(invoice, index, config, journal, dry_run)
+    output_file = write_invoice(invoice, index, config, customer, journal)
+    generated_tex_file = INVOICE_TMP_DIR / (output_file + ".tex")
+    generated_pdf_file = INVOICE_OUT_DIR / (output_file + ".pdf")
 
     # Only run the PDF generation command if not in dry run mode
     if not dry_run:
-        # Run the generate_pdf command within a Podman container
-        latex_command = compose_latex_command(INVOICE_OUT_DIR, generated_tex_file, verbose)
-        logger.debug(f"Latex command: {latex_command}")
-
-        # Execute the command to generate the PDF
-        execute_command(latex_command, exit_on_error=True, output_file=generated_pdf_file)
-
-        # If example mode, copy the generated PDF to the example directory
-        if example_mode:
-            Path.rename(
-                generated_pdf_file,
-                EXAMPLE_DIR / "invoice.example.pdf",
-            )
-            generated_pdf_file = EXAMPLE_DIR / "invoice.example.pdf"
-
-        # Open the pdf file
-        if config.settings.open_pdf_viewer:
-            # Needs to be done before thunderbird is opened, because it will block the terminal
-            execute_command(["xdg-open", str(generated_pdf_file)])
-
-        # Generate the email command to open Thunderbird with the invoice attached
-        if config.settings.open_mail_client:
-            thunderbird_command = get_thunderbird()
-
-            if thunderbird_command:
-                execute_command(
-                    compose_email(invoice, config, customer, thunderbird_command, generated_pdf_file, dry_run)
-                )
-
-        # Ask if everything looked good and if so, archive the invoice and save the invoice number to the csv file
-        if not (dry_run or example_mode) and utils.confirm(
-            "Did everything look good and do you want to archive the invoice?"
-        ):
-            # Archive the invoice
-            archive_pdf(output_file, invoice.date.year)
-
-            # Save the invoice number
-            store_invoice_parameter(invoice)
-            logger.success("Invoice archived and invoice number saved.")
-        else:
-            logger.info("Skipping invoice archiving and invoice number saving.")
+        if needs_compilation(index, output_file, journal):
+            # Run the generate_pdf command within a Podman container
+            latex_command = compose_latex_command(INVOICE_OUT_DIR, generated_tex_file, verbose)
+            logger.debug(f"Latex command: {latex_command}")
+
+            # Execute the command to generate the PDF
+            execute_command(latex_command, exit_on_error=True, output_file=generated_pdf_file)
+            journal.record(index, "compiled")
+
+        finalize_invoice(invoice, index, config, customer, output_file, journal, dry_run, example_mode)
     else:
         logger.info("Dry run mode enabled. Skipping PDF generation.")
         logger.debug(f"Rendered template saved to: {generated_tex_file}")
         logger.debug(f"Output file would be saved to: {generated_pdf_file}")
 
 
+def compile_queued_invoices(pending: list[tuple[int, str]], journal: BatchJournal):
+    """Submit the tex files (`index` and output file of each invoice) to the compile job queue and collect them."""
+    if not pending:
+        return
+
+    queue = DirectoryQueue()
+    batch = new_batch()
+    for index, output_file in pending:
+        queue.submit(batch, index, output_file, INVOICE_TMP_DIR / (output_file + ".tex"))
+    logger.info(f"Submitted {len(pending)} invoice(s) as batch {batch} to {queue.directory}")
+
+    for index in queue.collect(batch, len(pending), INVOICE_OUT_DIR):
+        journal.record(index, "compiled")
+
+
+def create_queued_invoices(
+    invoices: list[Invoice],
+    config: Config,
+    customer_file: Path,
+    journal: BatchJournal,
+    dry_run: bool,
+    example_mode: bool,
+):
+    """Create multiple invoices using the compile job queue.
+
+    All invoices are rendered and submitted first, so that the workers (see `src.jobs.run_worker`) can compile
+    them in parallel. Invoice numbers are assigned consecutively, therefore the invoices are archived strictly in
+    order: at the first invoice which failed or was declined, the numbers of all following invoices are released
+    and they are left for `resume` (so the numbering never has a gap).
+    """
+    prepared = []
+    for index, invoice in enumerate(invoices):
+        if invoice.status in ["sent", "paid"] or journal.state(index)["steps"] & JOURNAL_FINAL_STEPS:
+            continue
+
+        customer = utils.load_customer(customer_file, invoice.customer_id)
+        reserve_invoice(invoice, index, config, journal, dry_run)
+        prepared.append((index, invoice, customer, write_invoice(invoice, index, config, customer, journal)))
+
+    if dry_run:
+        logger.info(f"Dry run mode enabled. Skipping submission of {len(prepared)} invoice(s).")
+        return
+
+    pending = [
+        (index, output_file) for index, _, _, output_file in prepared if needs_compilation(index, output_file, journal)
+    ]
+    compile_queued_invoices(pending, journal)
+
+    prepared.sort(key=lambda p: p[1].invoice_id or 0)
+    for position, (index, invoice, customer, output_file) in enumerate(prepared):
+        remaining = prepared[position + 1 :]
+
+        if "compiled" not in journal.state(index)["steps"]:
+            logger.error(f"Invoice {invoice.invoice_number} could not be compiled.")
+        else:
+            finalize_invoice(invoice, index, config, customer, output_file, journal, dry_run, example_mode)
+            if example_mode or not remaining or "declined" not in journal.state(index)["steps"]:
+                continue
+
+        # The following invoices would leave a gap in the numbering, therefore they get new numbers when resuming
+        for remaining_index, _, _, remaining_output_file in remaining:
+            (INVOICE_OUT_DIR / (remaining_output_file + ".pdf")).unlink(missing_ok=True)
+            journal.record(remaining_index, JOURNAL_RELEASED_STEP)
+        logger.warning(f"Stopped at invoice {invoice.invoice_number}, the remaining invoices are left for `--resume`.")
+        return
+
+
+def get_input_files(example_mode: bool) -> tuple[Path, Path]:
+    """Return the customer database and config file used to create invoices."""
+    if example_mode:
+        return INVOICE_CUSTOMER_EXAMPLE_FILE, CONFIG_EXAMPLE_FILE
+
+    # Defaults to the data directory (customer database) and the project root directory (config file)
+    return INVOICE_CUSTOMER_FILE, Path(os.getenv("CONFIG_PATH", CONFIG_DEFAULT_FILE))
+
+
 def create_invoices(
     invoices_path: Path | str | None = None,
     dry_run: bool = False,
     verbose: bool = False,
+    queue: bool = False,
+    resume: bool = False,
 ):
     """Create multiple invoices.
 
     This function will iterate over all invoices in the invoice config file and create them.
     Based on the `customer_id` in the invoice config file, the customer will be loaded from the customer file.
+    With `queue`, the invoices are compiled by the workers of the compile job queue instead of locally.
+    Every batch is journaled, and an interrupted batch can be continued using `resume`.
     """
     config_logging(verbose)
 
     example_mode = invoices_path is None
-
-    if example_mode:
-        invoices_path = INVOICE_EXAMPLE_FILE
-        customer_database = INVOICE_CUSTOMER_EXAMPLE_FILE
-        config_path = CONFIG_EXAMPLE_FILE
-    else:
-        # Defaults to the data directory if environment variable is not set
-        customer_database = INVOICE_CUSTOMER_FILE
-        invoices_path = Path(invoices_path)
-        # Defaults to project root directory if environment variable is not set
-        config_path = Path(os.getenv("CONFIG_PATH", CONFIG_DEFAULT_FILE))
+    invoices_path = INVOICE_EXAMPLE_FILE if invoices_path is None else Path(invoices_path)
+    customer_database, config_path = get_input_files(example_mode)
 
     # Log the used files
     logger.debug(f"Using invoices file: {invoices_path}")
@@ -280,11 +620,28 @@ def create_invoices(
     logger.debug(f"Using config file: {config_path}")
 
     # Check if all files exist
-    for file in [Path(invoices_path), customer_database, config_path]:
+    for file in [invoices_path, customer_database, config_path]:
         if not file.exists():
             raise FileNotFoundError(f"File not found: {file}")
 
     config = load_config(config_path)
 
-    for invoice in utils.load_invoice(Path(invoices_path)).invoices:
-        create_invoice(invoice, config, customer_database, dry_run, verbose, example_mode)
+    invoices = utils.load_invoice(invoices_path).invoices
+    check_invoices(invoices, config, customer_database)
+
+    # Nothing is archived in dry run and example mode, therefore the journal is only kept in memory
+    if dry_run or example_mode:
+        if resume:
+            raise ValueError("Resuming a batch is not possible in dry run or example mode.")
+        journal = BatchJournal()
+    else:
+        journal = BatchJournal.open(invoices_path, resume)
+
+    if queue:
+        create_queued_invoices(invoices, config, customer_database, journal, dry_run, example_mode)
+    else:
+        for index, invoice in enumerate(invoices):
+            create_invoice(invoice, config, customer_database, dry_run, verbose, example_mode, index, journal)
+
+    if journal.file is not None:
+        journal.finish_if_complete([index for index, i in enumerate(invoices) if i.status not in ["sent", "paid"]])
@@ -1,10 +1,11 @@
 import csv
+import datetime
 from pathlib import Path
 
-import yaml
-
-from src.invoice.models import Customer, Invoices
-from src.settings import INVOICE_DIR
+from src.invoice.models import Contracts, Customer, Invoices
+from src.invoice.models.history import InvoiceRecord, ReminderRecord
+from src.settings import DUNNING_HISTORY_FILE, INVOICE_DIR, INVOICE_HISTORY_FILE
+from src.utils import load_cached, load_yaml
 
 
 def confirm(prompt: str, default: bool = True) -> bool:
@@ -47,12 +48,54 @@ def load_customer(file: Path, customer_id: str | int) -> Customer:
     return matching_customers[0]
 
 
+def parse_invoice(content: bytes) -> Invoices:
+    """Parse and validate an invoice file."""
+    return Invoices(**load_yaml(content))
+
+
 def load_invoice(file: Path) -> Invoices:
     """Load invoice file."""
-    with file.open("rb") as f:
-        parsed_file = yaml.safe_load(f)
-        invoices = Invoices(**parsed_file)
-    return invoices
+    # Invoices without a date default to today, therefore snapshots are only valid for one day
+    return load_cached(file, parse_invoice, salt=datetime.date.today().isoformat())
+
+
+def parse_contracts(content: bytes) -> Contracts:
+    """Parse and validate a contract file."""
+    return Contracts(**load_yaml(content))
+
+
+def load_contracts(file: Path) -> Contracts:
+    """Load contract file."""
+    return load_cached(file, parse_contracts)
+
+
+def load_invoice_history(file: Path = INVOICE_HISTORY_FILE) -> list[dict[str, str]]:
+    """Load all rows of the invoice archive (empty if there is no archive yet)."""
+    if not file.exists():
+        return []
+
+    with file.open("r") as f:
+        return [row for row in csv.DictReader(f) if row.get("invoice_id")]
+
+
+def load_invoice_index(file: Path = INVOICE_HISTORY_FILE) -> dict[int, InvoiceRecord]:
+    """Load the invoice archive, indexed by invoice id."""
+    records = (InvoiceRecord(**{k: v if v else None for k, v in row.items()}) for row in load_invoice_history(file))
+    return {record.invoice_id: record for record in records}
+
+
+def load_reminders(file: Path = DUNNING_HISTORY_FILE) -> dict[int, ReminderRecord]:
+    """Load the dunning archive, returning the latest reminder of each invoice."""
+    if not file.exists():
+        return {}
+
+    reminders: dict[int, ReminderRecord] = {}
+    with file.open("r") as f:
+        for row in csv.DictReader(f):
+            reminder = ReminderRecord(**row)
+            if reminder.invoice_id not in reminders or reminders[reminder.invoice_id].level < reminder.level:
+                reminders[reminder.invoice_id] = reminder
+    return reminders
 
 
 def print_customer(file: Path = INVOICE_DIR / "customer.csv") -> None:
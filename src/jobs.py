@@ -0,0 +1,290 @@
+import datetime as dt
+import os
+import shutil
+import socket
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from loguru import logger
+from pydantic import BaseModel
+
+from src.settings import QUEUE_DIR, QUEUE_TIMEOUT, TMP_DIR
+from src.utils import compose_latex_command, config_logging, execute_command
+
+WORKER_TMP_DIR = TMP_DIR / "worker"
+
+# Seconds between two heartbeats of a worker, and until a job without heartbeat is considered lost
+HEARTBEAT_INTERVAL = 10
+HEARTBEAT_TIMEOUT = 60
+MAX_ATTEMPTS = 3
+JOB_STATES = ["pending", "running", "done", "failed"]
+
+
+class Job(BaseModel):
+    """Compile job model, stored as json file within the queue directory."""
+
+    job_id: str
+    batch: str
+    name: str
+    order: int
+    attempts: int = 0
+    worker: str | None = None
+    error: str | None = None
+
+
+class DirectoryQueue:
+    """Job queue based on a (shared) directory.
+
+    Each job is a json file that is moved between the `pending`, `running`, `done` and `failed` directories.
+    Moving a file is atomic, therefore only one worker is able to claim a job, even across several machines
+    sharing the directory (e.g. using NFS). Another broker can replace this class by providing the same methods.
+    """
+
+    def __init__(self, directory: Path = QUEUE_DIR):
+        self.directory = directory
+        for sub_directory in [*JOB_STATES, "tex", "pdf", "staging"]:
+            (directory / sub_directory).mkdir(parents=True, exist_ok=True)
+
+    def job_file(self, state: str, job_id: str) -> Path:
+        return self.directory / state / f"{job_id}.json"
+
+    def write_job(self, job: Job, state: str):
+        """Write the job file atomically (readers never see a partially written file)."""
+        staging_file = self.directory / "staging" / f"{job.job_id}.{uuid.uuid4().hex}.json"
+        staging_file.write_text(job.model_dump_json())
+        staging_file.replace(self.job_file(state, job.job_id))
+
+    def move_job(self, job: Job, source: str, target: str) -> bool:
+        """Move a job between two states. Returns false if the job is not in the source state (anymore)."""
+        # Renaming the job file to a unique name is atomic, therefore only one process is able to move the job
+        claimed_file = self.directory / "staging" / f"{job.job_id}.{uuid.uuid4().hex}.json"
+        try:
+            self.job_file(source, job.job_id).rename(claimed_file)
+        except FileNotFoundError:
+            return False
+
+        claimed_file.write_text(job.model_dump_json())
+        claimed_file.replace(self.job_file(target, job.job_id))
+        return True
+
+    def submit(self, batch: str, order: int, name: str, tex_file: Path) -> Job:
+        """Submit a tex file to the queue."""
+        job = Job(job_id=f"{batch}-{order:04d}", batch=batch, name=name, order=order)
+        shutil.copyfile(tex_file, self.directory / "tex" / f"{job.job_id}.tex")
+        self.write_job(job, "pending")
+        logger.debug(f"Submitted job {job.job_id} ({tex_file})")
+        return job
+
+    def claim(self, worker: str) -> Job | None:
+        """Claim the oldest pending job, or return none if there is nothing to do."""
+        for job_file in sorted((self.directory / "pending").glob("*.json")):
+            try:
+                job = Job.model_validate_json(job_file.read_text())
+            except FileNotFoundError:
+                # Another worker was faster
+                continue
+
+            job.worker = worker
+            if self.move_job(job, "pending", "running"):
+                return job
+        return None
+
+    def heartbeat(self, job: Job):
+        """Mark a running job as alive."""
+        try:
+            os.utime(self.job_file("running", job.job_id))
+        except FileNotFoundError:
+            logger.warning(f"Job {job.job_id} is no longer running on this worker.")
+
+    def complete(self, job: Job, pdf_file: Path):
+        """Store the resulting pdf file and mark the job as done."""
+        staging_file = self.directory / "staging" / f"{job.job_id}.{uuid.uuid4().hex}.pdf"
+        shutil.copyfile(pdf_file, staging_file)
+        staging_file.replace(self.directory / "pdf" / f"{job.job_id}.pdf")
+
+        if self.move_job(job, "running", "done"):
+            return
+
+        if any(self.job_file(state, job.job_id).exists() for state in JOB_STATES):
+            logger.warning(f"Job {job.job_id} was requeued while running, keeping the result anyway.")
+        else:
+            # The batch was removed (e.g. after a timeout), therefore nobody collects the result
+            logger.warning(f"Job {job.job_id} was cancelled while running, discarding the result.")
+            (self.directory / "pdf" / f"{job.job_id}.pdf").unlink(missing_ok=True)
+
+    def fail(self, job: Job, error: str):
+        """Retry a failed job, or mark it as failed after `MAX_ATTEMPTS` attempts."""
+        job.attempts += 1
+        job.error = error
+        target = "failed" if job.attempts >= MAX_ATTEMPTS else "pending"
+        if self.move_job(job, "running", target):
+            logger.warning(f"Job {job.job_id} failed ({error}), moved to {target}.")
+
+    def requeue_stale(self):
+        """Retry all running jobs whose worker stopped sending heartbeats."""
+        deadline = time.time() - HEARTBEAT_TIMEOUT
+        for job_file in (self.directory / "running").glob("*.json"):
+            try:
+                if job_file.stat().st_mtime > deadline:
+                    continue
+                job = Job.model_validate_json(job_file.read_text())
+            except FileNotFoundError:
+                continue
+            self.fail(job, f"no heartbeat from worker {job.worker}")
+
+    def batch_jobs(self, batch: str) -> dict[str, list[Job]]:
+        """Return the jobs of a batch grouped by their state."""
+        jobs: dict[str, list[Job]] = {}
+        for state in JOB_STATES:
+            jobs[state] = []
+            for job_file in sorted((self.directory / state).glob(f"{batch}-*.json")):
+                try:
+                    jobs[state].append(Job.model_validate_json(job_file.read_text()))
+                except FileNotFoundError:
+                    # The job is being moved to another state
+                    continue
+        return jobs
+
+    def remove_batch(self, batch: str):
+        """Remove all files of a batch (job files, tex and pdf files) from the queue directory."""
+        for sub_directory in [*JOB_STATES, "tex", "pdf"]:
+            for file in (self.directory / sub_directory).glob(f"{batch}-*"):
+                file.unlink(missing_ok=True)
+
+    def collect(
+        self,
+        batch: str,
+        job_count: int,
+        out_dir: Path,
+        poll_interval: float = 2,
+        timeout: float = QUEUE_TIMEOUT,
+    ) -> dict[int, Path]:
+        """Wait until all jobs of a batch are finished and copy the pdf files to the output directory.
+
+        The result maps the order of each successful job to its pdf file. Jobs which failed or did not finish within
+        `timeout` seconds are missing. Afterwards, all files of the batch are removed from the queue directory.
+        """
+        deadline = time.monotonic() + timeout
+
+        while True:
+            jobs = self.batch_jobs(batch)
+            if len(jobs["done"]) + len(jobs["failed"]) >= job_count:
+                break
+
+            if time.monotonic() > deadline:
+                logger.error(
+                    f"Timeout after {timeout:.0f} seconds, {len(jobs['pending'])} pending and {len(jobs['running'])} "
+                    f"running job(s) of batch {batch} are cancelled. Is a worker running?"
+                )
+                break
+
+            logger.info(
+                f"Waiting for {len(jobs['pending'])} pending and {len(jobs['running'])} running job(s) "
+                f"of batch {batch}..."
+            )
+            self.requeue_stale()
+            time.sleep(poll_interval)
+
+        out_dir.mkdir(parents=True, exist_ok=True)
+        results: dict[int, Path] = {}
+
+        for job in jobs["done"]:
+            pdf_file = out_dir / f"{job.name}.pdf"
+            shutil.copyfile(self.directory / "pdf" / f"{job.job_id}.pdf", pdf_file)
+            results[job.order] = pdf_file
+
+        for job in jobs["failed"]:
+            logger.error(f"Job {job.job_id} ({job.name}) failed after {job.attempts} attempt(s): {job.error}")
+
+        # The files contain customer data, therefore they are not kept in the (shared) queue directory
+        self.remove_batch(batch)
+
+        return results
+
+
+def new_batch() -> str:
+    """Return a new, unique batch id."""
+    return f"{dt.datetime.now().strftime('%Y%m%d%H%M%S')}{uuid.uuid4().hex[:6]}"
+
+
+def send_heartbeats(queue: DirectoryQueue, job: Job, stop: threading.Event):
+    """Send heartbeats for a job until the stop event is set."""
+    while not stop.wait(HEARTBEAT_INTERVAL):
+        queue.heartbeat(job)
+
+
+def compile_job(queue: DirectoryQueue, job: Job, verbose: bool) -> Path | None:
+    """Compile the tex file of a job locally and return the pdf file (none on failure).
+
+    The work directory is created from scratch, so a retry never reuses the files of an earlier attempt.
+    """
+    work_dir = WORKER_TMP_DIR / job.job_id
+    shutil.rmtree(work_dir, ignore_errors=True)
+    work_dir.mkdir(parents=True)
+    tex_file = work_dir / f"{job.name}.tex"
+
+    try:
+        shutil.copyfile(queue.directory / "tex" / f"{job.job_id}.tex", tex_file)
+    except FileNotFoundError:
+        logger.warning(f"Job {job.job_id} was cancelled.")
+        return None
+
+    latex_command = compose_latex_command(work_dir, tex_file, verbose, interactive=False)
+    logger.debug(f"Latex command: {latex_command}")
+
+    pdf_file = work_dir / f"{job.name}.pdf"
+    return pdf_file if execute_command(latex_command, output_file=pdf_file) and pdf_file.exists() else None
+
+
+def run_worker(
+    queue_dir: Path | str | None = None,
+    once: bool = False,
+    poll_interval: float = 2,
+    verbose: bool = False,
+):
+    """Run a worker, which compiles the jobs of the queue.
+
+    Workers can run on several machines, as long as they share the queue directory (see `QUEUE_DIR`).
+    With `once`, the worker stops as soon as the queue is empty.
+    """
+    config_logging(verbose)
+
+    queue = DirectoryQueue(Path(queue_dir) if queue_dir else QUEUE_DIR)
+    worker = f"{socket.gethostname()}-{os.getpid()}"
+    logger.info(f"Worker {worker} is watching {queue.directory}")
+
+    while True:
+        queue.requeue_stale()
+        job = queue.claim(worker)
+
+        if job is None:
+            if once:
+                logger.info("Queue is empty, stopping worker.")
+                return
+            time.sleep(poll_interval)
+            continue
+
+        logger.info(f"Compiling job {job.job_id} ({job.name})")
+
+        # Send heartbeats while compiling, so other workers don't requeue the job
+        stop = threading.Event()
+        heartbeat = threading.Thread(target=send_heartbeats, args=(queue, job, stop), daemon=True)
+        heartbeat.start()
+
+        try:
+            try:
+                pdf_file = compile_job(queue, job, verbose)
+            finally:
+                stop.set()
+                heartbeat.join()
+
+            if pdf_file is None:
+                queue.fail(job, "latexmk failed")
+            else:
+                queue.complete(job, pdf_file)
+                logger.success(f"Job {job.job_id} done.")
+        finally:
+            # The files contain customer data, therefore they are not kept on the worker (whatever the outcome)
+            shutil.rmtree(WORKER_TMP_DIR / job.job_id, ignore_errors=True)
@@ -2,7 +2,10 @@ from pathlib import Path
 
 from loguru import logger
 
+from src.jobs import DirectoryQueue, new_batch
+from src.letter.models.letter import Letter
 from src.letter.utils import load_letter
+from src.models import Config
 from src.settings import (
     CONFIG_DEFAULT_FILE,
     CONFIG_EXAMPLE_FILE,
@@ -12,21 +15,47 @@ from src.settings import (
     OUT_DIR,
     TMP_DIR,
 )
-from src.utils import compose_latex_command, config_logging, execute_command, latex_jinja_env, load_config
+from src.utils import (
+    check_latex,
+    compose_latex_command,
+    config_logging,
+    execute_command,
+    latex_jinja_env,
+    load_config,
+)
 
 LETTER_OUT_DIR = OUT_DIR / "letter"
 LETTER_TMP_DIR = TMP_DIR / "letter"
 
 
+def render_letter(config: Config, letter: Letter, content: str, name: str) -> str:
+    """Render the letter template and check the resulting tex file.
+
+    The content has to be valid LaTeX (e.g. converted by pandoc), as it is inserted without escaping.
+    """
+    template = latex_jinja_env.get_template("letter.tex.j2")
+
+    # Render the template
+    rendered_template = template.render(
+        config=config,
+        letter=letter,
+        content=content,
+    )
+    check_latex(rendered_template, name)
+    return rendered_template
+
+
 def create_letter(
     letter_file: Path | str | None = None,
     config_file: Path | str | None = None,
     dry_run: bool = False,
     verbose: bool = False,
+    queue: bool = False,
 ):
     """Create a letter.
 
     This function will create a letter based on the given config and letter files.
+    With `queue`, the letter is compiled by a worker of the compile job queue instead of locally.
     """
     config_logging(verbose)
 
@@ -45,14 +74,7 @@ def create_letter(
     config = load_config(config_file)
     frontmatter, content = load_letter(letter_file)
 
-    template = latex_jinja_env.get_template("letter.tex.j2")
-
-    # Render the template
-    rendered_template = template.render(
-        config=config,
-        letter=frontmatter,
-        content=content,
-    )
+    rendered_template = render_letter(config, frontmatter, content, str(letter_file))
 
     # Create output and tmp directory if they don't exist
     LETTER_OUT_DIR.mkdir(parents=True, exist_ok=True)
@@ -64,12 +86,22 @@ def create_letter(
 
     # Only run the PDF generation command if not in dry run mode
     if not dry_run:
-        # Run the generate_pdf command within a Podman container
-        latex_command = compose_latex_command(LETTER_OUT_DIR, LETTER_TMP_DIR / "letter.tex", not verbose)
-
-        # Execute the command to generate the PDF
-        logger.debug(f"Running command: {latex_command}")
-        execute_command(latex_command, exit_on_error=True, output_file=destination_path)
+        if queue:
+            # Submit the tex file and wait for a worker to compile it
+            job_queue = DirectoryQueue()
+            batch = new_batch()
+            job_queue.submit(batch, 0, destination_path.stem, LETTER_TMP_DIR / "letter.tex")
+            logger.info(f"Submitted letter as batch {batch} to {job_queue.directory}")
+
+            if job_queue.collect(batch, 1, LETTER_OUT_DIR).get(0) != destination_path:
+                raise RuntimeError("The letter could not be compiled.")
+        else:
+            # Run the generate_pdf command within a Podman container
+            latex_command = compose_latex_command(LETTER_OUT_DIR, LETTER_TMP_DIR / "letter.tex", not verbose)
+
+            # Execute the command to generate the PDF
+            logger.debug(f"Running command: {latex_command}")
+            execute_command(latex_command, exit_on_error=True, output_file=destination_path)
 
         # If example mode, copy the generated PDF to the example directory
         if example_mode:
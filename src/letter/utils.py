@@ -1,18 +1,21 @@
 from pathlib import Path
 
 import pypandoc
-import yaml
 
 from src.letter.models.letter import Letter
+from src.utils import load_cached, load_yaml
 
 
-def load_letter(file: Path) -> tuple[Letter, str]:
-    """Load invoice file."""
-    with file.open("rb") as f:
-        parsed_file = f.read().decode("utf-8")
-    frontmatter, content = parsed_file.split("---", 2)[1:]
+def parse_letter(content: bytes) -> tuple[Letter, str]:
+    """Parse the frontmatter and convert the markdown content of a letter file."""
+    frontmatter, markdown = content.decode("utf-8").split("---", 2)[1:]
 
-    attributes = Letter(**yaml.safe_load(frontmatter))
-    converted_content = pypandoc.convert_text(content, "latex", format="md")
+    attributes = Letter(**load_yaml(frontmatter))
+    converted_content = pypandoc.convert_text(markdown, "latex", format="md")
 
     return attributes, converted_content
+
+
+def load_letter(file: Path) -> tuple[Letter, str]:
+    """Load letter file."""
+    return load_cached(file, parse_letter)
@@ -1,8 +1,12 @@
 from fire import Fire
 
-from src.invoice.template import create_invoices
+from src.invoice.dunning import create_dunning
+from src.invoice.recurring import generate_recurring
+from src.invoice.template import create_invoices, mark_paid
 from src.invoice.utils import print_customer
+from src.jobs import run_worker
 from src.letter.template import create_letter
+from src.texlive import build_tex_image
 from src.utils import generate_schema
 
 if __name__ == "__main__":
@@ -10,11 +14,21 @@ if __name__ == "__main__":
         {
             # Create one or more invoices
             "invoice": create_invoices,
+            # Create the recurring invoices of all contracts due within a period
+            "generate_recurring": generate_recurring,
+            # Mark invoices as paid
+            "paid": mark_paid,
+            # Create reminder letters for all overdue invoices
+            "dunning": create_dunning,
             # Create a letter
             "letter": create_letter,
+            # Compile the jobs submitted to the compile job queue
+            "worker": run_worker,
             # Print customer information
             "print_customer": print_customer,
             # Generate JSON schema for the invoice and letter templates
             "schemas": generate_schema,
+            # Create the definition of a minimal TeX image containing only the used packages
+            "tex_image": build_tex_image,
         }
     )
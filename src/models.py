@@ -41,6 +41,7 @@ class Invoice(BaseModel):
 
     VAT: int
     due_days: int
+    reminder_days: int = Field(7, ge=1)
 
     @field_validator("VAT")
     @classmethod
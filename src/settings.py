@@ -7,15 +7,30 @@ INVOICE_DIR = Path(os.getenv("INVOICE_DIR", DATA_DIR))
 EXAMPLE_DIR = Path("examples")
 OUT_DIR = Path("out")
 TMP_DIR = Path("tmp")
+CACHE_DIR = TMP_DIR / "cache"
+# Days after which unused snapshots are removed from the cache
+CACHE_MAX_AGE = 30
+QUEUE_DIR = Path(os.getenv("QUEUE_DIR", TMP_DIR / "queue"))
+# Seconds to wait for the workers to finish a batch (e.g. if no worker is running)
+QUEUE_TIMEOUT = float(os.getenv("QUEUE_TIMEOUT", "600"))
+
+# Container images used to compile the templates (see `src.texlive.build_tex_image`)
+TEX_FULL_IMAGE = "texlive/texlive:latest-full"
+TEX_MINIMAL_BASE_IMAGE = "texlive/texlive:latest-minimal"
+TEX_IMAGE = os.getenv("TEX_IMAGE", TEX_FULL_IMAGE)
+TEX_IMAGE_FILE = Path("Containerfile")
 
 # Example file paths
 CONFIG_EXAMPLE_FILE = EXAMPLE_DIR / "config.example.yml"
 INVOICE_EXAMPLE_FILE = EXAMPLE_DIR / "invoices.example.yml"
 INVOICE_CUSTOMER_EXAMPLE_FILE = EXAMPLE_DIR / "customer.example.csv"
+CONTRACT_EXAMPLE_FILE = EXAMPLE_DIR / "contracts.example.yml"
 LETTER_EXAMPLE_FILE = EXAMPLE_DIR / "letter.example.md"
 
 # Default file paths
 CONFIG_DEFAULT_FILE = Path("config.toml")
 INVOICE_HISTORY_FILE = INVOICE_DIR / "invoice.csv"
+DUNNING_HISTORY_FILE = INVOICE_DIR / "dunning.csv"
+JOURNAL_DIR = INVOICE_DIR / "journal"
 INVOICE_CUSTOMER_FILE = INVOICE_DIR / "customer.csv"
 LETTER_DEFAULT_FILE = DATA_DIR / "letter.yml"
@@ -0,0 +1,130 @@
+import subprocess
+from pathlib import Path
+
+from loguru import logger
+
+from src.invoice.template import assign_invoice_number, render_invoice
+from src.invoice.utils import load_customer, load_invoice
+from src.letter.template import render_letter
+from src.letter.utils import load_letter
+from src.settings import (
+    CONFIG_EXAMPLE_FILE,
+    INVOICE_CUSTOMER_EXAMPLE_FILE,
+    INVOICE_EXAMPLE_FILE,
+    LETTER_EXAMPLE_FILE,
+    TEX_FULL_IMAGE,
+    TEX_IMAGE_FILE,
+    TEX_MINIMAL_BASE_IMAGE,
+    TMP_DIR,
+)
+from src.utils import compose_container_command, compose_latex_command, config_logging, execute_command, load_config
+
+TEXLIVE_TMP_DIR = TMP_DIR / "texlive"
+# Empty build context of the image (the image definition does not copy any files)
+TEXLIVE_CONTEXT_DIR = TEXLIVE_TMP_DIR / "context"
+
+# Packages which are needed, but not listed in the recorder files (formats, hyphenation patterns and tools)
+TEXLIVE_BASE_PACKAGES = ["latex-bin", "latexmk", "hyphen-german"]
+
+
+def parse_recorder_file(file: Path) -> set[str]:
+    """Return all files of the TeX distribution (relative to `texmf-dist`) read during a compilation."""
+    files = set()
+
+    with file.open("r") as f:
+        for line in f:
+            if not line.startswith("INPUT ") or "/texmf-dist/" not in line:
+                continue
+            files.add("texmf-dist/" + line.strip().split("/texmf-dist/", 1)[1])
+
+    return files
+
+
+def load_texlive_database(image: str = TEX_FULL_IMAGE) -> dict[str, str]:
+    """Load the TeX Live package database of the image and return a mapping from each file to its package."""
+    command = compose_container_command(
+        ["sh", "-c", 'cat "$(kpsewhich -var-value TEXMFROOT)/tlpkg/texlive.tlpdb"'], image=image, interactive=False
+    )
+    logger.debug(f"Database command: {command}")
+    database = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+
+    file_packages = {}
+    package = None
+    for line in database.splitlines():
+        if line.startswith("name "):
+            package = line.removeprefix("name ")
+        elif line.startswith(" texmf-dist/") and package:
+            # File entries may contain additional attributes (e.g. ` texmf-dist/... details="..."`)
+            file_packages[line.split()[0]] = package
+
+    return file_packages
+
+
+def render_containerfile(packages: list[str]) -> str:
+    """Render the definition of the minimal TeX image."""
+    install_packages = " \\\n".join(f"    {package}" for package in packages)
+    return (
+        "# Generated by `just tex-image`, containing only the packages used by the templates\n"
+        f"FROM {TEX_MINIMAL_BASE_IMAGE}\n\n"
+        f"RUN tlmgr install \\\n{install_packages}\n"
+    )
+
+
+def render_examples() -> list[Path]:
+    """Render the example invoices and letter into the TeX Live tmp directory and return the tex files.
+
+    A dedicated directory is used, so files of earlier (e.g. real customer) invoices are never compiled.
+    """
+    TEXLIVE_TMP_DIR.mkdir(parents=True, exist_ok=True)
+    config = load_config(CONFIG_EXAMPLE_FILE)
+    rendered = {}
+
+    for index, invoice in enumerate(load_invoice(INVOICE_EXAMPLE_FILE).invoices, 1):
+        assign_invoice_number(invoice, config, index)
+        customer = load_customer(INVOICE_CUSTOMER_EXAMPLE_FILE, invoice.customer_id)
+        rendered[f"invoice_{index}"] = render_invoice(invoice, config, customer)
+
+    letter, content = load_letter(LETTER_EXAMPLE_FILE)
+    rendered["letter"] = render_letter(config, letter, content, str(LETTER_EXAMPLE_FILE))
+
+    tex_files = []
+    for name, rendered_template in rendered.items():
+        tex_file = TEXLIVE_TMP_DIR / f"{name}.tex"
+        with tex_file.open("w") as f:
+            f.write(rendered_template)
+        tex_files.append(tex_file)
+
+    return tex_files
+
+
+def build_tex_image(verbose: bool = False):
+    """Create the definition of a minimal TeX image, based on the files the templates actually use.
+
+    The example invoice and letter are compiled once within the full TeX Live image, recording every file read
+    by TeX. These files are mapped to their TeX Live packages, which are installed on top of a minimal image.
+    """
+    config_logging(verbose)
+    used_files: set[str] = set()
+
+    for tex_file in render_examples():
+        latex_command = compose_latex_command(TEXLIVE_TMP_DIR, tex_file, verbose, image=TEX_FULL_IMAGE, recorder=True)
+        logger.debug(f"Latex command: {latex_command}")
+        execute_command(latex_command, exit_on_error=True)
+
+        used_files |= parse_recorder_file(TEXLIVE_TMP_DIR / (tex_file.stem + ".fls"))
+
+    file_packages = load_texlive_database()
+    packages = set(TEXLIVE_BASE_PACKAGES)
+
+    for file in sorted(used_files):
+        if file in file_packages:
+            packages.add(file_packages[file])
+        else:
+            logger.warning(f"No TeX Live package found for {file}")
+
+    with TEX_IMAGE_FILE.open("w") as f:
+        f.write(render_containerfile(sorted(packages)))
+    TEXLIVE_CONTEXT_DIR.mkdir(parents=True, exist_ok=True)
+
+    logger.success(f"Image definition with {len(packages)} package(s) saved to: {TEX_IMAGE_FILE}")
+    logger.info("Set `TEX_IMAGE` to the image built from it (e.g. `localhost/latex-templates-tex`) to use it.")
@@ -1,20 +1,66 @@
+import functools
+import hashlib
 import json
 import os
+import pickle
+import re
 import subprocess
 import sys
+import time
+import uuid
+from collections.abc import Callable
 from pathlib import Path
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any
 
 import jinja2
+import pydantic
 import yaml
 from loguru import logger
+from markupsafe import Markup
 
-from src.invoice.models import Customer, Invoices
+from src.invoice.models import Contracts, Customer, Invoices
 from src.models import Config
+from src.settings import CACHE_DIR, CACHE_MAX_AGE, TEX_IMAGE
 
 if TYPE_CHECKING:
     from pydantic import BaseModel
 
+LATEX_SPECIAL_CHARACTERS = {
+    "\\": r"\textbackslash{}",
+    "&": r"\&",
+    "%": r"\%",
+    "$": r"\$",
+    "#": r"\#",
+    "_": r"\_",
+    "{": r"\{",
+    "}": r"\}",
+    "~": r"\textasciitilde{}",
+    "^": r"\textasciicircum{}",
+}
+LATEX_SPECIAL_PATTERN = re.compile("|".join(re.escape(c) for c in LATEX_SPECIAL_CHARACTERS))
+LATEX_CONTROL_SEQUENCE = re.compile(r"\\([A-Za-z@]+|.?)")
+LATEX_ENVIRONMENT = re.compile(r"\s*\{([^{}]*)\}")
+# The content of these environments and commands is not parsed by TeX (e.g. code blocks converted by pandoc)
+LATEX_VERBATIM_ENVIRONMENTS = {"verbatim", "verbatim*", "Verbatim", "Highlighting", "lstlisting", "minted", "comment"}
+LATEX_VERBATIM_COMMANDS = {"verb", "lstinline"}
+
+
+def escape_latex(value: Any) -> Any:
+    """Escape the LaTeX special characters of a template variable.
+
+    This is the `finalize` hook of the jinja2 environment, therefore every variable is escaped automatically.
+    Trusted markup (e.g. the letter content converted by pandoc) can be excluded using the `safe` filter.
+    """
+    if value is None or isinstance(value, Markup):
+        return value
+    return LATEX_SPECIAL_PATTERN.sub(lambda match: LATEX_SPECIAL_CHARACTERS[match.group()], str(value))
+
+
+def escape_latex_url(value: Any) -> Markup:
+    """Escape an url used as link target (hyperref handles all characters except `%` and `#` itself)."""
+    return Markup(re.sub(r"([%#])", r"\\\1", str(value)))
+
+
 latex_jinja_env = jinja2.Environment(
     block_start_string="((*",
     block_end_string="*))",
@@ -24,48 +70,257 @@ latex_jinja_env = jinja2.Environment(
     comment_end_string="=))",
     trim_blocks=True,
     autoescape=False,
+    finalize=escape_latex,
     loader=jinja2.FileSystemLoader("template"),
 )
+latex_jinja_env.filters["url"] = escape_latex_url
+
+
+def check_latex_environment(
+    command: str, environment: str, line_number: int, environments: list[tuple[str, int]]
+) -> list[str]:
+    """Track a `begin` or `end` command and return the problems found."""
+    if command == "begin":
+        environments.append((environment, line_number))
+    elif environments and environments[-1][0] == environment:
+        environments.pop()
+    else:
+        return [f"line {line_number}: end of {environment} without begin"]
+    return []
+
+
+def skip_latex_verbatim(line: str, index: int, command_name: str, line_number: int) -> tuple[int, list[str]]:
+    r"""Skip the argument of a verbatim command (e.g. `\verb|...|`) and return the index after it."""
+    if command_name == "verb" and line[index : index + 1] == "*":
+        index += 1
+
+    delimiter = line[index : index + 1]
+    if not delimiter or delimiter.isalpha() or (command_name == "lstinline" and delimiter in "[{"):
+        # Not a verbatim argument (e.g. `\lstinline{...}`, which is parsed like a regular argument)
+        return index, []
+
+    end = line.find(delimiter, index + 1)
+    if end == -1:
+        return len(line), [f"line {line_number}: unterminated \\{command_name}"]
+    return end + 1, []
+
+
+def check_latex_command(
+    line: str, index: int, line_number: int, environments: list[tuple[str, int]]
+) -> tuple[int, list[str]]:
+    """Check the command starting at `index` and return the index after it (and its arguments, if consumed)."""
+    command = LATEX_CONTROL_SEQUENCE.match(line, index)
+    command_name = command.group(1) if command else ""
+    index = command.end() if command else index + 1
+
+    if command_name in LATEX_VERBATIM_COMMANDS:
+        return skip_latex_verbatim(line, index, command_name, line_number)
+
+    environment = LATEX_ENVIRONMENT.match(line, index)
+    if command_name in ["begin", "end"] and environment:
+        return environment.end(), check_latex_environment(command_name, environment.group(1), line_number, environments)
+    return index, []
+
+
+def check_latex_line(line: str, line_number: int, groups: list[int], environments: list[tuple[str, int]]) -> list[str]:
+    """Check one line of a tex file, tracking the open braces and environments across lines."""
+    problems = []
+    index = 0
+
+    while index < len(line):
+        # Skip the content of a verbatim environment until its end
+        if environments and environments[-1][0] in LATEX_VERBATIM_ENVIRONMENTS:
+            end = line.find(f"\\end{{{environments[-1][0]}}}", index)
+            if end == -1:
+                break
+            index = end
+
+        char = line[index]
+
+        # The rest of the line is a comment
+        if char == "%":
+            break
+
+        if char == "\\":
+            index, command_problems = check_latex_command(line, index, line_number, environments)
+            problems += command_problems
+            continue
+
+        if char == "{":
+            groups.append(line_number)
+        elif char == "}" and groups:
+            groups.pop()
+        elif char == "}":
+            problems.append(f"line {line_number}: unmatched closing brace")
+        elif char == "#" and not line[index + 1 : index + 2].isdigit():
+            problems.append(f"line {line_number}: unescaped #")
+        index += 1
+
+    return problems
+
+
+def check_latex(tex: str, name: str):
+    """Check a rendered tex file for errors, before starting the (slow) compilation.
+
+    Detects unbalanced braces and environments, unescaped `#` and leftover template syntax. The content of verbatim
+    environments and commands (e.g. code blocks) is skipped. Raises a `ValueError` listing all problems.
+    """
+    problems = []
+    groups: list[int] = []
+    environments: list[tuple[str, int]] = []
+
+    for line_number, line in enumerate(tex.splitlines(), 1):
+        if "(((" in line or "((*" in line:
+            problems.append(f"line {line_number}: leftover template syntax")
+        problems += check_latex_line(line, line_number, groups, environments)
+
+    problems += [f"line {line_number}: unclosed brace" for line_number in groups]
+    problems += [f"line {line_number}: unclosed environment {env}" for env, line_number in environments]
+
+    if problems:
+        raise ValueError(f"Invalid tex file {name}:\n" + "\n".join(problems))
+
+
+# Use the C-accelerated loader of libyaml, if pyyaml was built with it
+YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+def load_yaml(content: bytes | str) -> Any:
+    """Parse a yaml document (safe loader, using libyaml if available)."""
+    return yaml.load(content, Loader=YamlLoader)
+
+
+@functools.cache
+def source_fingerprint() -> str:
+    """Return a fingerprint of the source code and libraries, which invalidates cached snapshots after changes.
+
+    Besides the models, the pickled snapshots depend on the versions of python, pydantic and pyyaml.
+    """
+    sources = sorted(Path(__file__).parent.rglob("*.py"))
+    versions = f"{sys.version}:{pydantic.VERSION}:{yaml.__version__}"
+    return hashlib.sha256(
+        "".join(f"{source}:{source.stat().st_mtime_ns}:{source.stat().st_size}" for source in sources).encode()
+        + versions.encode()
+    ).hexdigest()
+
+
+def prune_cache(current_file: Path):
+    """Remove older snapshots of the same parser and file, and all snapshots not used within `CACHE_MAX_AGE` days."""
+    parser_and_file = current_file.name.rsplit("-", 1)[0]
+    deadline = time.time() - CACHE_MAX_AGE * 24 * 60 * 60
+
+    for cache_file in CACHE_DIR.glob("*.pickle"):
+        if cache_file == current_file:
+            continue
+        try:
+            if cache_file.name.rsplit("-", 1)[0] == parser_and_file or cache_file.stat().st_mtime < deadline:
+                cache_file.unlink()
+        except FileNotFoundError:
+            # Removed by a concurrent run
+            continue
+
+
+def load_cached[T](file: Path, parse: Callable[[bytes], T], salt: str = "") -> T:
+    """Load a file using `parse` and cache the validated result.
+
+    The snapshot is keyed by the hash of the file content (and the source code), so unchanged files are loaded
+    without parsing and validating them again. The `salt` adds values the result depends on to the key.
+    Only the latest snapshot of each file is kept.
+    """
+    content = file.read_bytes()
+    key = hashlib.sha256(b"\0".join([content, source_fingerprint().encode(), salt.encode()])).hexdigest()
+    file_key = hashlib.sha256(str(file.resolve()).encode()).hexdigest()[:16]
+    cache_file = CACHE_DIR / f"{parse.__module__}.{parse.__qualname__}-{file_key}-{key}.pickle"
+
+    if cache_file.exists():
+        try:
+            with cache_file.open("rb") as f:
+                cached_result = pickle.load(f)
+            # Mark the snapshot as used (see `prune_cache`)
+            os.utime(cache_file)
+            logger.debug(f"Using cached snapshot of {file}")
+            return cached_result
+        except Exception as e:  # noqa: BLE001
+            # Unpickling may fail in many ways (e.g. after a library upgrade), the file is parsed again instead
+            logger.warning(f"Ignoring invalid cached snapshot {cache_file}: {e}")
+
+    result = parse(content)
+
+    # Write the snapshot atomically, so concurrent runs never read a partial file
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    staging_file = cache_file.with_suffix(f".{uuid.uuid4().hex}")
+    with staging_file.open("wb") as f:
+        pickle.dump(result, f)
+    staging_file.replace(cache_file)
+    prune_cache(cache_file)
+
+    return result
+
+
+def parse_config(content: bytes) -> Config:
+    """Parse and validate a config file."""
+    return Config(**load_yaml(content))
 
 
 def load_config(file: Path) -> Config:
     """Load config file."""
-    with file.open("rb") as f:
-        parsed_file = yaml.safe_load(f)
-        config = Config(**parsed_file)
-    return config
+    return load_cached(file, parse_config)
 
 
-def compose_latex_command(out_dir: Path, tex_file: Path, verbose: bool):
-    """Compose the latex command.
+def compose_container_command(command: list[str], image: str = TEX_IMAGE, interactive: bool = True) -> list[str]:
+    """Compose a command running within the TeX container.
 
-    This function will compose the latex command to generate a pdf from a tex file.
-    The generation will take place within a container
+    The working directory is mounted into the container, therefore all paths have to be relative to it.
+    Without `interactive`, no terminal is attached (e.g. to capture the output).
     """
     return [
         os.environ.get("CONTAINER_RUNTIME", "podman"),
         "run",
         "--rm",
-        "-it",
+        *(["-it"] if interactive else []),
         "-v",
         f"{Path.cwd()}:/app:z",
         "-w",
         "/app",
         "--userns",
         f"keep-id:uid={os.getuid()},gid={os.getgid()}",
-        "texlive/texlive:latest-full",
-        "latexmk",
-        f"-output-directory={out_dir}",
-        "-pdf",
-        "-verbose" if verbose else "-quiet",
-        str(tex_file),
+        image,
+        *command,
     ]
 
 
+def compose_latex_command(
+    out_dir: Path,
+    tex_file: Path,
+    verbose: bool,
+    interactive: bool = True,
+    image: str = TEX_IMAGE,
+    recorder: bool = False,
+):
+    """Compose the latex command.
+
+    This function will compose the latex command to generate a pdf from a tex file.
+    The generation will take place within a container (without a terminal attached if `interactive` is false).
+    With `recorder`, a `.fls` file listing all files read by TeX is written to the output directory.
+    """
+    return compose_container_command(
+        [
+            "latexmk",
+            f"-output-directory={out_dir}",
+            "-pdf",
+            "-verbose" if verbose else "-quiet",
+            *(["-recorder"] if recorder else []),
+            str(tex_file),
+        ],
+        image=image,
+        interactive=interactive,
+    )
+
+
 def generate_schema():
     """Generate json schemas for pydantic models."""
     schema_dir = Path("schema")
-    schemas: list[BaseModel] = [Config, Invoices, Customer]
+    schemas: list[BaseModel] = [Config, Invoices, Contracts, Customer]
 
     # Delete existing schemas
     if schema_dir.exists():
@@ -86,8 +341,8 @@ def config_logging(debug: bool):
     logger.add(sys.stderr, level="DEBUG" if debug else "INFO")
 
 
-def execute_command(command: list[str], exit_on_error: bool = False, output_file: Path | str | None = None):
-    """Run a command as subprocess."""
+def execute_command(command: list[str], exit_on_error: bool = False, output_file: Path | str | None = None) -> bool:
+    """Run a command as subprocess and return whether it succeeded."""
     try:
         subprocess.run(command, check=True)
         logger.success("Command executed successfully.")
@@ -99,3 +354,5 @@ def execute_command(command: list[str], exit_on_error: bool = False, output_file
         if exit_on_error:
             logger.error("Exiting due to command failure.")
             sys.exit(1)
+        return False
+    return True